@@ -0,0 +1,66 @@
+/* Native batch path for the software convolutional encoder.
+ *
+ * This is an optional accelerator for ConvolutionalCoderSoftware.encode_block;
+ * the python implementation is used when it is not built.
+ */
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+
+static PyObject *
+encode(PyObject *self, PyObject *args)
+{
+    Py_buffer bits;
+    int k;
+    unsigned long g1, g2, reg = 0;
+
+    if (!PyArg_ParseTuple(args, "y*ikk|k", &bits, &k, &g1, &g2, &reg))
+        return NULL;
+
+    PyObject *codewords = PyBytes_FromStringAndSize(NULL, bits.len);
+    if (codewords == NULL) {
+        PyBuffer_Release(&bits);
+        return NULL;
+    }
+
+    const unsigned char *in = (const unsigned char *)bits.buf;
+    unsigned char *out = (unsigned char *)PyBytes_AS_STRING(codewords);
+    unsigned long state;
+    Py_ssize_t i;
+
+    for (i = 0; i < bits.len; i++) {
+        /* Shift register */
+        state = ((unsigned long)in[i] << (k - 1)) | reg;
+        reg = state >> 1;
+
+        /* G1 G2 */
+        out[i] = ((__builtin_popcountl(state & g1) & 1) << 1) |
+                 (__builtin_popcountl(state & g2) & 1);
+    }
+
+    PyBuffer_Release(&bits);
+    return Py_BuildValue("(Nk)", codewords, reg);
+}
+
+static PyMethodDef methods[] = {
+    {"encode", encode, METH_VARARGS,
+     "encode(bits, k, g1, g2, reg=0) -> (codewords, reg)\n\n"
+     "Encode a block of data bits (one byte per bit), starting from shift\n"
+     "register state `reg`. Returns the codeword bytes and the final\n"
+     "register state."},
+    {NULL, NULL, 0, NULL},
+};
+
+static struct PyModuleDef module = {
+    PyModuleDef_HEAD_INIT,
+    "_viterbi_encode",
+    "Native batch path for the software convolutional encoder",
+    -1,
+    methods,
+};
+
+PyMODINIT_FUNC
+PyInit__viterbi_encode(void)
+{
+    return PyModule_Create(&module);
+}
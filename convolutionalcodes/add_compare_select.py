@@ -1,7 +1,10 @@
 from amaranth import *
 from amaranth.sim import Simulator, Active
 
+import numpy as np
+
 from .util.test import *
+from .util.vector_sim import run_vectors
 
 
 class ACSU(Elaboratable):
@@ -42,10 +45,16 @@ class ACSU(Elaboratable):
         pm_out = self.pm_out
         survivor_path = self.survivor_path
 
-        # Select survivor path
-        m.d.comb += survivor_path.eq(pm_low > pm_high)
-        # Mux output path
-        m.d.comb += pm_out.eq(Mux(survivor_path, pm_high, pm_low))
+        # Single subtraction provides both the comparison (sign bit) and the
+        # selected output, instead of a comparator plus a Mux chain
+        diff = Signal(signed(len(pm_low) + 1))
+        m.d.comb += diff.eq(pm_low - pm_high)
+
+        # Select survivor path: high unless the subtraction went negative. On
+        # equal metrics either path is a valid survivor
+        m.d.comb += survivor_path.eq(~diff[-1])
+        # Mask the difference with the survivor bit: pm_low - diff = pm_high
+        m.d.comb += pm_out.eq(pm_low - (diff & Repl(survivor_path, len(diff))))
 
         return m
 
@@ -58,41 +67,45 @@ class ACSUTest(TestCase):
         self.survivor_path = Signal()
         return ACSU(self.pm_low, self.pm_high, self.pm_out, self.survivor_path)
 
+    def check_path_metrics(self, inputs, pm_out, survivor):
+        """Run stimulus vectors and compare against expected outputs
+
+        Expected values of -1 mean don't care
+        """
+        out_pm, out_survivor = yield from run_vectors(
+            inputs, [self.pm_out, self.survivor_path]
+        )
+
+        care = pm_out >= 0
+        np.testing.assert_array_equal(out_pm[care], pm_out[care])
+        care = survivor >= 0
+        np.testing.assert_array_equal(out_survivor[care], survivor[care])
+
     @sync_test_case
     def test_unit_hard_path_metrics(self):
         """Test the ACSU with Hard Path Metrics"""
 
-        # expected outputs (None = don't care)
-        pm_out = [0, 0, 0, 1]
-        survivor = [None, 1, 0, None]
+        i = np.arange(4)
+        inputs = [(self.pm_low, i & 1), (self.pm_high, (i & 2) >> 1)]
 
-        for i in range(4):
-            yield self.pm_low.eq(i & 1)
-            yield self.pm_high.eq((i & 2) >> 1)
-            yield
+        # expected outputs (-1 = don't care)
+        pm_out = np.array([0, 0, 0, 1])
+        survivor = np.array([-1, 1, 0, -1])
 
-            if pm_out[i] != None:
-                self.assertEqual((yield self.pm_out), pm_out[i])
-            if survivor[i] != None:
-                self.assertEqual((yield self.survivor_path), survivor[i])
+        yield from self.check_path_metrics(inputs, pm_out, survivor)
 
     @sync_test_case
     def test_unit_soft_path_metrics(self):
         """Test the ACSU with Soft Path Metrics"""
 
-        # expected outputs (None = don't care)
-        pm_out = [0, 0, 0, 0, 0, 1, 1, 1, 0, 1, 2, 2, 0, 1, 2, 3]
-        survivor = [None, 1, 1, 1, 0, None, 1, 1, 0, 0, None, 1, 0, 0, 0, None]
+        i = np.arange(16)
+        inputs = [(self.pm_low, i & 3), (self.pm_high, (i & 0xC) >> 2)]
 
-        for i in range(16):
-            yield self.pm_low.eq(i & 3)
-            yield self.pm_high.eq((i & 0xC) >> 2)
-            yield
+        # expected outputs (-1 = don't care)
+        pm_out = np.array([0, 0, 0, 0, 0, 1, 1, 1, 0, 1, 2, 2, 0, 1, 2, 3])
+        survivor = np.array([-1, 1, 1, 1, 0, -1, 1, 1, 0, 0, -1, 1, 0, 0, 0, -1])
 
-            if pm_out[i] != None:
-                self.assertEqual((yield self.pm_out), pm_out[i])
-            if survivor[i] != None:
-                self.assertEqual((yield self.survivor_path), survivor[i])
+        yield from self.check_path_metrics(inputs, pm_out, survivor)
 
 
 if __name__ == "__main__":
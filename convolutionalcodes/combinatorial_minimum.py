@@ -51,28 +51,18 @@ class CombinatorialMinimum(Elaboratable):
         lsb = self._lsb
         width = self._width - lsb
 
-        pm = [p[lsb:] for p in self.pm]  # Truncate 'lsb' bits
-
-        def minimum(ia, ib, step, pm_out):
-            if step == 1:  # Leaf
-                m.d.comb += pm_out.eq(
-                    Mux(
-                        pm[ia] < pm[ib],
-                        pm[ia],
-                        pm[ib],
-                    )
-                )
-            else:  # Stem
-                pm_a = Signal(width)
-                pm_b = Signal(width)
-                step = int(step / 2)
-                minimum(ia, ia + step, step, pm_a)
-                minimum(ib, ib + step, step, pm_b)
-
-                m.d.comb += pm_out.eq(Mux(pm_a < pm_b, pm_a, pm_b))
-
-        # Trunk
-        minimum(0, int(len(pm) / 2), int(len(pm) / 2), self.minimum[lsb:])
+        level = [p[lsb:] for p in self.pm]  # Truncate 'lsb' bits
+
+        # Balanced reduction tree, built iteratively one level at a time. Each
+        # level halves the number of candidates, with one Signal per pair; the
+        # final pair drives the output directly
+        while len(level) > 1:
+            next_level = []
+            for a, b in zip(level[::2], level[1::2]):
+                pm_out = Signal(width) if len(level) > 2 else self.minimum[lsb:]
+                m.d.comb += pm_out.eq(Mux(a < b, a, b))
+                next_level.append(pm_out)
+            level = next_level
 
         return m
 
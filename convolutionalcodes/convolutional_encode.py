@@ -1,7 +1,15 @@
 from amaranth import *
 from amaranth.sim import Simulator, Active
 
+import numpy as np
+
 from .util.test import *
+from .convolutional_encode_nb import encode_block_nb
+
+try:
+    from . import _viterbi_encode
+except ImportError:
+    _viterbi_encode = None  # Optional C extension, built by setup.py
 
 
 class ConvolutionalCoder(Elaboratable):
@@ -72,8 +80,19 @@ class ConvolutionalCoder(Elaboratable):
         # G1 G2
         c1 = Signal()
         c2 = Signal()
-        m.d.comb += c1.eq((state & g1).xor())
-        m.d.comb += c2.eq((state & g2).xor())
+
+        def generator_parity(g):
+            # When the polynomial is a compile-time constant, xor only the
+            # tapped state bits. This gives the synthesizer a narrower xor
+            # tree than the full k-wide AND + reduction
+            if isinstance(g, Const):
+                taps = [state[i] for i in range(k) if (g.value >> i) & 1]
+                return Cat(*taps).xor()
+
+            return (state & g).xor()
+
+        m.d.comb += c1.eq(generator_parity(g1))
+        m.d.comb += c2.eq(generator_parity(g2))
 
         # Output
         m.d.comb += self.c.eq(Cat(c2, c1))  # LSB, MSB
@@ -102,6 +121,9 @@ class ConvolutionalCoderSoftware:
     next(int) : int
         Returns codeword
 
+    encode_block(numpy array) : numpy array
+        Returns codewords for a whole block of data bits
+
     """
 
     def __init__(self, k=3, g1=0b111, g2=0b101):
@@ -109,29 +131,78 @@ class ConvolutionalCoderSoftware:
         self._g1 = g1
         self._g2 = g2
 
+        # Codeword for every possible shift register state. Only 2^k states
+        # exist, so two popcounts per bit become a single table lookup
+        parity = ConvolutionalCoderSoftware.parity_kr
+        self._ctab = bytes(
+            (parity(state & g1) << 1) | parity(state & g2) for state in range(1 << k)
+        )
+
         self.reg = 0
 
     @staticmethod
     def parity_kr(x):
-        bit = 0
-        parity = False
-        while x:
-            parity = not parity
-            x = x & (x - 1)  # Clear least significant bit that is set
-
-        return int(parity)
+        # int.bit_count() is a hardware popcount, much faster than clearing
+        # set bits one at a time in a python loop
+        return x.bit_count() & 1
 
     def next(self, data):
         # Shift register
         state = (1 << (self._k - 1) if data == 1 else 0) + self.reg
         self.reg = state >> 1
 
-        # G1 G2
-        c1 = ConvolutionalCoderSoftware.parity_kr(state & self._g1)
-        c2 = ConvolutionalCoderSoftware.parity_kr(state & self._g2)
-
         # Output
-        return (c1 * 2) + c2
+        return self._ctab[state]
+
+    def encode_block(self, bits):
+        """Encode a whole block of data bits at once
+
+        Vectorized equivalent of calling `next` for each bit. Starts from the
+        current shift register state and leaves the register as if `next` had
+        been called for every bit.
+
+        Parameters
+        ----------
+        bits : numpy array
+            Data bits, one bit per element
+
+        Returns codewords c1 c2 as a numpy uint8 array, one per data bit
+        """
+        k = self._k
+
+        if len(bits) == 0:
+            # sliding_window_view rejects windows wider than its input
+            return np.empty(0, dtype=np.uint8)
+
+        if _viterbi_encode is not None:
+            # Native shift register loop with hardware popcount
+            codewords, self.reg = _viterbi_encode.encode(
+                np.ascontiguousarray(bits, dtype=np.uint8).tobytes(),
+                k,
+                self._g1,
+                self._g2,
+                self.reg,
+            )
+            return np.frombuffer(codewords, dtype=np.uint8)
+
+        bits = np.asarray(bits, dtype=np.uint16)
+
+        # The shift register state for bit i is a k-wide window over the data
+        # sequence, oldest bit in the LSB. Prepend the current register
+        # contents (bit j of reg is the data bit from k-1-j steps ago)
+        init = (self.reg >> np.arange(k - 1, dtype=np.uint16)) & 1
+        window = np.lib.stride_tricks.sliding_window_view(
+            np.concatenate([init.astype(np.uint16), bits]), k
+        )
+        states = window @ (np.uint16(1) << np.arange(k, dtype=np.uint16))
+
+        # Gather codewords from the state table
+        codewords = np.frombuffer(self._ctab, dtype=np.uint8)[states]
+
+        if len(states):
+            self.reg = int(states[-1]) >> 1
+
+        return codewords
 
 
 class ConvolutionalCoderTest(TestCase):
@@ -141,6 +212,8 @@ class ConvolutionalCoderTest(TestCase):
         g2 = {3: 0b101, 4: 0b1010, 5: 0b11101, 7: 0b1011011}[k]
 
         self.k = k
+        self.g1 = g1
+        self.g2 = g2
         self.model = ConvolutionalCoderSoftware(k=k, g1=g1, g2=g2)
         self.data = Signal()
         return ConvolutionalCoder(self.data, k=k, g1=g1, g2=g2)
@@ -183,21 +256,37 @@ class ConvolutionalCoderTest(TestCase):
         # Test Word
         word = 0x485743BD3923DA93284920121328543BCB843984A0129
 
-        while word:
-            d = word & 1
-            word >>= 1
+        bits = [(word >> i) & 1 for i in range(word.bit_length())]
+        bits += [0] * (self.k - 1)  # Terminate..
+
+        # Batch-encode the whole word in one call
+        expected = encode_block_nb(bits, k=self.k, g1=self.g1, g2=self.g2)
 
+        for d, c in zip(bits, expected):
             yield self.data.eq(d)
             yield
 
-            assert (yield self.dut.c) == self.model.next(d)
+            assert (yield self.dut.c) == c
 
-        # Terminate..
-        for _ in range(self.k - 1):
-            yield self.data.eq(0)
-            yield
+    def test_unit_encode_block(self):
+        """Compare the block encoder against the bit-at-a-time model"""
+
+        # Test Word
+        word = 0x485743BD3923DA93284920121328543BCB843984A0129
+
+        for k in [3, 4, 5, 7]:
+            g1 = {3: 0b111, 4: 0b1101, 5: 0b10011, 7: 0b1111001}[k]
+            g2 = {3: 0b101, 4: 0b1010, 5: 0b11101, 7: 0b1011011}[k]
+
+            reference = ConvolutionalCoderSoftware(k=k, g1=g1, g2=g2)
+            model = ConvolutionalCoderSoftware(k=k, g1=g1, g2=g2)
+
+            bits = [(word >> i) & 1 for i in range(word.bit_length())]
+            bits += [0] * (k - 1)  # Terminate
 
-            assert (yield self.dut.c) == self.model.next(0)
+            expected = [reference.next(d) for d in bits]
+            np.testing.assert_array_equal(model.encode_block(bits), expected)
+            self.assertEqual(model.reg, reference.reg)
 
 
 if __name__ == "__main__":
@@ -1,12 +1,41 @@
 from amaranth import *
 from amaranth.sim import Simulator, Active
 
+from functools import lru_cache
+
 from .add_compare_select import ACSU
 from .combinatorial_minimum import CombinatorialMinimum
 
 from .util.test import *
 
 
+def _bit_reverse(x, bits):
+    """Reverse the least significant `bits` bits of x. SWAR, 32 bit"""
+    x = ((x >> 1) & 0x55555555) | ((x & 0x55555555) << 1)
+    x = ((x >> 2) & 0x33333333) | ((x & 0x33333333) << 2)
+    x = ((x >> 4) & 0x0F0F0F0F) | ((x & 0x0F0F0F0F) << 4)
+    x = ((x >> 8) & 0x00FF00FF) | ((x & 0x00FF00FF) << 8)
+    x = ((x >> 16) & 0x0000FFFF) | ((x & 0x0000FFFF) << 16)
+    return x >> (32 - bits)
+
+
+@lru_cache(maxsize=None)
+def _van_der_corput_sequence(n):
+    """Integer Van Der Corput sequence base 2, length n
+
+    For n a power of 2, element i is simply i with its log2(n) bits reversed.
+    This is exact integer arithmetic, unlike the textbook floating-point
+    radical inverse.
+
+    Memoized: the sequence is fixed for a given n, and the PMU butterfly
+    requests the same lengths for every instantiation
+    """
+    assert n & (n - 1) == 0, "Sequence length must be a power of 2"
+
+    log2n = (n - 1).bit_length()
+    return tuple(_bit_reverse(i, log2n) for i in range(n))
+
+
 class PMU(Elaboratable):
     """Path Metric Unit (PMU) for a R = 1/2 Viterbi Decoder
 
@@ -102,16 +131,7 @@ class PMU(Elaboratable):
     @staticmethod
     def van_der_corput_sequence(n):
         """Integer Van Der Corput sequence base 2, length n"""
-
-        def vdc(n):
-            vdc, denom = 0, 1
-            while n:
-                denom *= 2
-                n, remainder = divmod(n, 2)
-                vdc += remainder / denom
-            return vdc
-
-        return [int(n * vdc(i)) for i in range(n)]
+        return _van_der_corput_sequence(n)
 
     def elaborate(self, platform):
         m = Module()
@@ -140,22 +160,26 @@ class PMU(Elaboratable):
         van_der_corput = PMU.van_der_corput_sequence(butterfly)
 
         # Instantiate ACS blocks in butterfly structure
-        for j in range(butterfly):
+        for j, v in enumerate(van_der_corput):
             low = 2 * j
-            high = (2 * j) + 1
-            b = 4 * van_der_corput[j]
+            high = low + 1
+
+            # Branch metrics and source path metrics for this butterfly
+            bm_l0, bm_h0, bm_l1, bm_h1 = bm[4 * v : 4 * v + 4]
+            pm_a = pm[j]
+            pm_b = pm[j + butterfly]
 
             # Low ACSU
             acsu0 = ACSU(
-                bm[b + 0] + pm[j],
-                bm[b + 2] + pm[j + butterfly],
+                bm_l0 + pm_a,
+                bm_l1 + pm_b,
                 pm_acs_out[low],
                 survivor_paths[low],
             )
             # High ACSU
             acsu1 = ACSU(
-                bm[b + 1] + pm[j],
-                bm[b + 3] + pm[j + butterfly],
+                bm_h0 + pm_a,
+                bm_h1 + pm_b,
                 pm_acs_out[high],
                 survivor_paths[high],
             )
@@ -187,18 +211,18 @@ class PMU(Elaboratable):
                 )
 
                 # [] <- pm_acs_out
-                m.d.sync += [pm_reg[i].eq(pm_acs_out[i]) for i in range(n_metrics)]
+                m.d.sync += [r.eq(acs) for r, acs in zip(pm_reg, pm_acs_out)]
                 # [] <- normalised
                 m.d.sync += [
-                    pm_norm_reg[i].eq(pm_reg[i] - comb_min.minimum)
-                    for i in range(n_metrics)
+                    norm.eq(r - comb_min.minimum)
+                    for norm, r in zip(pm_norm_reg, pm_reg)
                 ]
 
                 # Was valid: pm_acs_out -> [] ->
                 # Not valid: normalised -> [] ->
                 m.d.comb += [
-                    pm[i].eq(Mux(bm_valid_reg, pm_reg[i], pm_norm_reg[i]))
-                    for i in range(n_metrics)
+                    p.eq(Mux(bm_valid_reg, r, norm))
+                    for p, r, norm in zip(pm, pm_reg, pm_norm_reg)
                 ]
             else:
                 # Normalise on every cycle
@@ -211,12 +235,21 @@ class PMU(Elaboratable):
                     lsb=self._minimum_lsb,
                 )
 
+                # Normalisation is fused into the ACS output stage: subtract
+                # the minimum combinationally on the butterfly outputs, so the
+                # registered metrics are already normalised and feed the next
+                # butterfly directly. No separate normalisation stage
+                pm_norm = [
+                    Signal(pm_width, name=f"pm_norm{i}") for i in range(n_metrics)
+                ]
+                m.d.comb += [
+                    norm.eq(acs - comb_min.minimum)
+                    for norm, acs in zip(pm_norm, pm_acs_out)
+                ]
+
                 # Register normalised path metrics
                 with m.If(bm_valid):
-                    m.d.sync += [
-                        pm[i].eq(pm_acs_out[i] - comb_min.minimum)
-                        for i in range(n_metrics)
-                    ]
+                    m.d.sync += [p.eq(norm) for p, norm in zip(pm, pm_norm)]
         else:
             # Never normalise. In soft decision mode the path metrics may
             # overflow
@@ -225,40 +258,43 @@ class PMU(Elaboratable):
 
             # Register path metrics
             with m.If(bm_valid):
-                m.d.sync += [pm[i].eq(pm_acs_out[i]) for i in range(n_metrics)]
+                m.d.sync += [p.eq(acs) for p, acs in zip(pm, pm_acs_out)]
 
         return m
 
 
+# PMUTest stimulus, hoisted to module constants so they are built once rather
+# than re-parsed for every test invocation in the k sweep
+_LOW_PATTERN = int("10" * 64, 2)  # Low branches
+_HIGH_PATTERN = int("01" * 64, 2)  # High branches
+# Expected result for high branches
+_MAX_WINNERS = {k: 2 ** (2 ** (k - 1)) - 1 for k in (3, 4, 5, 7)}
+
+
 class PMUTest(TestCase):
     def instantiate_dut(self, k=3):
         self._k = k
         self.bm = [Signal() for _ in range(2 ** k)]
-        return PMU(self.bm, k=k, normalise=True)
+        self.bm_packed = Signal(2 ** k)
+        self.pmu = PMU(self.bm, k=k, normalise=True)
+
+        # Drive all branch metrics from one packed signal, so the test can
+        # set 2^k stimulus bits with a single yield
+        m = Module()
+        m.submodules.pmu = self.pmu
+        m.d.comb += Cat(*self.bm).eq(self.bm_packed)
+        return m
 
     def set_bm(self, value):
-        for i in range(len(self.bm)):
-            yield self.bm[i].eq(value & 1)
-            value >>= 1
+        yield self.bm_packed.eq(value)
 
     @sync_test_case_convolutional_k_3_4_5_7
     def test_unit_path_metrics(self):
         """Test PMU"""
 
-        # Low branches
-        low = int(
-            "1010101010101010101010101010101010101010101010101010101010101010"
-            "1010101010101010101010101010101010101010101010101010101010101010",
-            2,
-        )
-        # High branches
-        high = int(
-            "0101010101010101010101010101010101010101010101010101010101010101"
-            "0101010101010101010101010101010101010101010101010101010101010101",
-            2,
-        )
-        # Expected result for high branches
-        maximum_winners = 2 ** (2 ** (self._k - 1)) - 1
+        low = _LOW_PATTERN
+        high = _HIGH_PATTERN
+        maximum_winners = _MAX_WINNERS[self._k]
 
         print(f"test k={self._k}")
 
@@ -266,17 +302,17 @@ class PMUTest(TestCase):
         yield from self.set_bm(high)
         for _ in range(self._k):
             yield
-        self.assertEqual((yield self.dut.local_winners), maximum_winners)
+        self.assertEqual((yield self.pmu.local_winners), maximum_winners)
 
         yield from self.set_bm(low)  # Stream of low branches
         for _ in range(self._k):
             yield
-        self.assertEqual((yield self.dut.local_winners), 0)
+        self.assertEqual((yield self.pmu.local_winners), 0)
 
         yield from self.set_bm(high)  # Stream of high branches
         for _ in range(self._k):
             yield
-        self.assertEqual((yield self.dut.local_winners), maximum_winners)
+        self.assertEqual((yield self.pmu.local_winners), maximum_winners)
 
 
 if __name__ == "__main__":
@@ -118,11 +118,8 @@ class Traceback(Elaboratable):
         if tb_length == None:
             tb_length = 5 * k  # Common rule of thumb
 
-        tb_order = 0 if tb_length & (tb_length - 1) else -1
-        while tb_length:
-            tb_order += 1
-            tb_length >>= 1
-        # tb_order is a power of 2
+        # Round up to the next power of 2
+        tb_order = (tb_length - 1).bit_length()
 
         if verbose:
             print(f"Traceback Order = {tb_order} Length = {2**tb_order}")
@@ -273,8 +270,10 @@ class TracebackTest(TestCase):
         self.sim.add_clock(1 / 2e6, domain="sync_tb")
 
     def clock_out_data(self):
-        if (yield self.data_valid):
-            self.output.append((yield self.data))
+        # Sample both output signals with a single simulator read
+        v = yield Cat(self.data, self.data_valid)
+        if v & 2:
+            self.output.append(v & 1)
             self.output_count += 1
         yield
 
@@ -0,0 +1,41 @@
+""" Vectorized stimulus/response driving for pysim test cases. """
+
+import numpy as np
+
+from amaranth.sim import Settle
+
+
+def run_vectors(inputs, outputs):
+    """Drive batched stimulus vectors and sample batched responses
+
+    Intended to be called with `yield from` inside a simulation process. Each
+    step drives every input signal from its stimulus array, settles the
+    simulation, and samples every output signal. Batching the stimulus this
+    way avoids building a python loop of per-signal test code for small
+    combinatorial DUTs.
+
+    Parameters
+    ----------
+    inputs : list of (Signal, numpy array)
+        Stimulus vectors. All arrays must have the same length
+
+    outputs : list of Signal
+        Signals to sample after each step
+
+    Returns a list of numpy arrays, one per output signal, with one sample
+    per step
+    """
+    lengths = {len(arr) for _, arr in inputs}
+    assert len(lengths) == 1, "All stimulus vectors must have the same length"
+    (n,) = lengths
+
+    results = [np.empty(n, dtype=np.int64) for _ in outputs]
+
+    for i in range(n):
+        for sig, arr in inputs:
+            yield sig.eq(int(arr[i]))
+        yield Settle()
+        for sig, result in zip(outputs, results):
+            result[i] = yield sig
+
+    return results
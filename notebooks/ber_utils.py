@@ -1,7 +1,43 @@
-from multiprocessing import Pool
+import os
+import tempfile
+from functools import lru_cache
+from multiprocessing import Pool, shared_memory
 from scipy.signal import max_len_seq
 import numpy as np
 
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# PCG64 generator, roughly 2x faster than the legacy np.random.normal.
+# Note fork copies this state into pool workers, so _attach_shared reseeds
+# it to keep the noise realizations independent across workers
+_rng = np.random.default_rng()
+
+
+def _prbs24_kernel(out):
+    """Fill `out` with packed bits of the 24-stage maximum length sequence
+
+    Bit-packed Fibonacci LFSR for x^24 + x^23 + x^22 + x^17 + 1, the same
+    polynomial and all-ones seed as scipy's max_len_seq(24), so the output
+    is bit-for-bit identical. Eight sequence bits are packed per byte,
+    first bit in the MSB to match np.unpackbits
+    """
+    state = np.uint32(0xFFFFFF)
+    for i in range(out.shape[0]):
+        b = np.uint8(0)
+        for _ in range(8):
+            bit = state & np.uint32(1)
+            b = (b << np.uint8(1)) | np.uint8(bit)
+            fb = (bit ^ (state >> 17) ^ (state >> 22) ^ (state >> 23)) & np.uint32(1)
+            state = (state >> np.uint32(1)) | (fb << np.uint32(23))
+        out[i] = b
+
+
+if njit is not None:
+    _prbs24_kernel = njit(cache=True)(_prbs24_kernel)
+
 
 def awgn_channel(signal, eb_n0_dB=0):
     """
@@ -11,14 +47,23 @@ def awgn_channel(signal, eb_n0_dB=0):
     n_dB = -eb_n0_dB
     n = 10 ** (n_dB / 10)
 
-    noise = np.random.normal(0, np.sqrt(n), len(signal))
+    # Fill the noise buffer in place, scale it, then add the signal into it.
+    # One allocation instead of three full-size temporaries
+    noise = np.empty(len(signal), dtype=np.float64)
+    _rng.standard_normal(out=noise)
+    noise *= np.sqrt(n)
+    noise += signal
 
-    return signal + noise
+    return noise
 
 
+@lru_cache(maxsize=8)
 def sequence(length=1e6):
     """Deterministic Maximum Length Sequence
 
+    The sequence only depends on its length, so it is memoized in process and
+    cached on disk across runs. Treat the returned array as read-only.
+
     Parameters
     ----------
     length: int
@@ -26,11 +71,33 @@ def sequence(length=1e6):
     assert length < 2 ** 24
     length = int(length)
 
-    sequence, state = max_len_seq(24, length=length)
-    return np.array(sequence).astype(np.int8) * 2 - 1  # +1 and -1
+    # Generating the LFSR takes seconds at length 1e6; reuse an on-disk copy
+    # when one exists. Mapped read-only, so forked workers share the pages
+    path = os.path.join(tempfile.gettempdir(), f"prbs24_{length}.npy")
+    try:
+        return np.load(path, mmap_mode="r")
+    except (OSError, ValueError):
+        pass
+
+    if njit is not None:
+        # Compiled bit-packed LFSR, two orders of magnitude faster than
+        # scipy's one-bit-per-iteration loop
+        packed = np.empty((length + 7) // 8, dtype=np.uint8)
+        _prbs24_kernel(packed)
+        seq = np.unpackbits(packed)[:length].astype(np.int8) * 2 - 1
+    else:
+        seq, state = max_len_seq(24, length=length)
+        seq = np.array(seq).astype(np.int8) * 2 - 1  # +1 and -1
+
+    try:
+        np.save(path, seq)
+    except OSError:
+        pass  # No cache, but the sequence is still usable
+
+    return seq
 
 
-def decision(s, q=1):
+def decision(s, q=1, out=None):
     """
     Quantise signal `s` into 2**q levels
 
@@ -41,13 +108,26 @@ def decision(s, q=1):
     Parameters
     ----------
     s: numpy array
+
+    out: numpy uint8 array, optional
+        Preallocated output buffer. Passing this avoids an allocation when
+        quantising repeatedly, as in a BER sweep
     """
     assert q > 0
     maximum = 2 ** (q - 1)
 
-    s = np.array(s)
+    if out is None:
+        out = np.empty(np.shape(s), dtype=np.uint8)
+
+    # One float temporary from the clip; scale and offset run in place and
+    # the final store truncates into the uint8 output. The previous
+    # expression materialised a fresh array for every step
+    buf = np.asarray(np.clip(s, -1, 1), dtype=np.float64)
+    np.add(buf, 0.999999999, out=buf)
+    np.multiply(buf, maximum, out=buf)
+    out[...] = buf
 
-    return ((np.clip(s, -1, 1) + 0.999999999) * maximum).astype(np.uint8)
+    return out
 
 
 def map_symbols(s, *args, **kwargs):
@@ -67,25 +147,58 @@ def bit_error_rate(s1: np.ndarray, s2: np.ndarray):
     ----------
     s1, s2: numpy array
     """
-    s2 = np.array(s2[: len(s1)])
+    s2 = np.asarray(s2)[: s1.size]
 
     assert s1.shape == s2.shape
 
-    matches = np.sum(s1 == s2)
+    # Count mismatches directly: no copy of s2 and no reduction over an
+    # intermediate boolean array
+    errors = np.count_nonzero(np.not_equal(s1, s2))
 
-    if matches < len(s1):
-        return 1.0 - (matches / len(s1))
+    if errors:
+        return errors / s1.size
     else:
-        return np.NaN
+        return np.nan
 
 
 # Multiprocessing BER sweep
+#
+# The encoded and reference signals are identical for every sweep point, so
+# they are published once in shared memory and attached once per worker
+# instead of being pickled into every task
+_shared = {}
+
+
+def _attach_shared(coded_name, coded_shape, coded_dtype, sig_name, sig_shape, sig_dtype):
+    """Pool initializer: attach the shared stimulus arrays in this worker"""
+    # Replace the generator state copied in by fork, so workers do not all
+    # draw the same noise
+    global _rng
+    _rng = np.random.default_rng()
+
+    shm_coded = shared_memory.SharedMemory(name=coded_name)
+    shm_signal = shared_memory.SharedMemory(name=sig_name)
+
+    # Keep the segments referenced for the worker lifetime
+    _shared["segments"] = (shm_coded, shm_signal)
+    _shared["coded"] = np.ndarray(coded_shape, coded_dtype, buffer=shm_coded.buf)
+    _shared["signal"] = np.ndarray(sig_shape, sig_dtype, buffer=shm_signal.buf)
+
+
+def _share(arr):
+    """Copy an array into a new shared memory segment"""
+    shm = shared_memory.SharedMemory(create=True, size=arr.nbytes)
+    np.ndarray(arr.shape, arr.dtype, buffer=shm.buf)[:] = arr
+    return shm
+
+
 def ber_calculation(arg):
-    coded = arg[0]
-    signal = arg[1]
-    eb_n0 = arg[2]
-    q = arg[3]
-    decode_fn = arg[4]
+    eb_n0 = arg[0]
+    q = arg[1]
+    decode_fn = arg[2]
+
+    coded = _shared["coded"]
+    signal = _shared["signal"]
 
     channel = awgn_channel(coded, eb_n0_dB=eb_n0)
     bits = decision(channel, q=q)
@@ -124,19 +237,43 @@ def ber_curve(
     # Encode Maximum Length Sequence
     signal = sequence(length)
     if encode_fn:
-        coded = encode_fn(signal)
+        coded = np.asarray(encode_fn(signal))
     else:
         coded = signal  # Uncoded
     print(".", end="")
 
-    # Divide the calculations among a multiprocessing pool
-    with Pool(processes=4) as pool:
-        args = [
-            [coded, signal, eb_n0, q, decode_fn]
-            for eb_n0 in range(start_dB, end_dB + step, step)
-        ]
-
-        result = pool.map(ber_calculation, args)
-        (eb_n0_x, ber) = zip(*result)
+    # Publish the stimulus once; workers attach on start-up and each task
+    # carries only its sweep parameters
+    shm_coded = _share(coded)
+    shm_signal = _share(signal)
+
+    try:
+        # Divide the calculations among a multiprocessing pool
+        with Pool(
+            processes=4,
+            initializer=_attach_shared,
+            initargs=(
+                shm_coded.name,
+                coded.shape,
+                coded.dtype,
+                shm_signal.name,
+                signal.shape,
+                signal.dtype,
+            ),
+        ) as pool:
+            args = [
+                (eb_n0, q, decode_fn) for eb_n0 in range(start_dB, end_dB + step, step)
+            ]
+
+            # Collect results as workers finish instead of blocking on an
+            # ordered map, then re-order by Eb/N0. Sweep points take very
+            # different times (low Eb/N0 decodes are slower), so this stops
+            # one slow point holding up collection of the others
+            result = sorted(pool.imap_unordered(ber_calculation, args))
+            (eb_n0_x, ber) = zip(*result)
+    finally:
+        for shm in (shm_coded, shm_signal):
+            shm.close()
+            shm.unlink()
 
     return np.array(eb_n0_x), np.array(ber)
@@ -1,4 +1,6 @@
+import os
 import subprocess
+from itertools import chain
 from threading import Thread
 import numpy as np
 
@@ -13,16 +15,26 @@ def viterbi_cxxrtl_tb(coded_sequence, cxxrtl_tb_filename):
         Executable name
     """
 
-    coded_string = "".join([chr(c + 97) for c in coded_sequence])
-    cxxrtl_bytes = bytearray(coded_string + ".", "ascii")
+    # Map symbols to their ASCII encoding ('a' + symbol) in one pass
+    cxxrtl_bytes = (np.asarray(coded_sequence, dtype=np.uint8) + 97).tobytes() + b"."
     decoded = []
 
     def decode_output(out, decoded):
-        for line in iter(out.readline, b""):
-            result = [1 if x == 49 else -1 for x in line if x == 48 or x == 49]
-            decoded.extend(result)
+        # Drain stdout in large blocks rather than line-buffered readline
+        fd = out.fileno()
+        buf = bytearray()
+        while True:
+            chunk = os.read(fd, 1 << 16)
+            if not chunk:
+                break
+            buf += chunk
         out.close()
 
+        # Convert the ASCII '0'/'1' stream to +1/-1 in one vectorized pass
+        arr = np.frombuffer(buf, dtype=np.uint8)
+        arr = arr[(arr == 48) | (arr == 49)]
+        decoded.extend(np.where(arr == 49, np.int8(1), np.int8(-1)))
+
     # Call out to cxxrtl process
     cxxrtl_exec = subprocess.Popen(
         cxxrtl_tb_filename, stdout=subprocess.PIPE, stdin=subprocess.PIPE
@@ -30,14 +42,16 @@ def viterbi_cxxrtl_tb(coded_sequence, cxxrtl_tb_filename):
 
     # Thread to decode the output
     t = Thread(target=decode_output, args=(cxxrtl_exec.stdout, decoded))
-    t.daemon = True  # thread dies with the program
     t.start()
 
-    # Chunked input
+    # Chunked input: zero-copy memoryview slices interleaved with newlines
     size = 2 ** 14
-    for pos in range(0, len(cxxrtl_bytes), size):
-        cxxrtl_exec.stdin.write(cxxrtl_bytes[pos : pos + size])
-        cxxrtl_exec.stdin.write(b"\n")
+    mv = memoryview(cxxrtl_bytes)
+    cxxrtl_exec.stdin.writelines(
+        chain.from_iterable(
+            (mv[pos : pos + size], b"\n") for pos in range(0, len(mv), size)
+        )
+    )
 
     # Close stdin
     try:
@@ -45,10 +59,8 @@ def viterbi_cxxrtl_tb(coded_sequence, cxxrtl_tb_filename):
     except:
         pass
 
-    # Wait for stdout to close
-    while not cxxrtl_exec.stdout.closed:
-        pass
-
+    # The decoder thread exits once it reads EOF on stdout
+    t.join()
     cxxrtl_exec.wait()
 
     return np.array(decoded)
@@ -0,0 +1,192 @@
+"""Frame-parallel software Viterbi decoder for BER sweeps
+
+The pysim/cxxrtl models decode one symbol per simulation step, which is far
+too slow to drive a 1e6-sample BER sweep from python. This module provides a
+compiled decode kernel with the same codeword conventions as ViterbiDecode:
+the input is the interleaved quantised stream [x0, x1, x0, x1, ...] produced
+by `ber_utils.decision`, where 0 represents a logical 0 and x_max a logical 1.
+
+The stream is split into subframes that are decoded in parallel. Each
+subframe is decoded with extra symbols of warm-up and run-out overlap so the
+survivor paths have converged before any decision is kept; an overlap of a
+few constraint lengths is sufficient for a R = 1/2 code.
+
+numba is optional: without it the same kernel runs in the interpreter, which
+is only suitable for short sequences.
+"""
+
+import unittest
+from functools import partial
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+    prange = range
+
+
+def _decode_frames(bits, out, cw, k, x_max, subframe, overlap):
+    n = out.shape[0]
+    n_states = 1 << (k - 1)
+    mask = (1 << (k - 2)) - 1
+
+    n_frames = (n + subframe - 1) // subframe
+
+    for f in prange(n_frames):
+        start = f * subframe
+        end = min(start + subframe, n)
+
+        # Decode overlap symbols either side of the kept region, so the
+        # survivor paths have merged before the first kept decision
+        lo = max(0, start - overlap)
+        hi = min(n, end + overlap)
+        steps = hi - lo
+
+        # Path metrics. The encoder starts from state 0, so only the very
+        # first frame pins the initial state
+        pm = np.zeros(n_states, dtype=np.int64)
+        if lo == 0:
+            pm[:] = 1 << 30
+            pm[0] = 0
+
+        pm_next = np.empty(n_states, dtype=np.int64)
+        survivors = np.empty((steps, n_states), dtype=np.uint8)
+
+        for t in range(steps):
+            x0 = np.int64(bits[2 * (lo + t)])
+            x1 = np.int64(bits[2 * (lo + t) + 1])
+
+            # Manhattan branch metric for each of the four codewords
+            bm0_0 = x0  # c1 = 0
+            bm0_1 = x_max - x0  # c1 = 1
+            bm1_0 = x1  # c2 = 0
+            bm1_1 = x_max - x1  # c2 = 1
+
+            for s_new in range(n_states):
+                d = s_new >> (k - 2)
+                m = s_new & mask
+
+                # Two predecessor states, differing in their oldest bit
+                old0 = 2 * m
+                old1 = old0 + 1
+
+                c = cw[(d << (k - 1)) | old0]
+                bm_a = (bm0_1 if c & 2 else bm0_0) + (bm1_1 if c & 1 else bm1_0)
+                c = cw[(d << (k - 1)) | old1]
+                bm_b = (bm0_1 if c & 2 else bm0_0) + (bm1_1 if c & 1 else bm1_0)
+
+                metric_a = pm[old0] + bm_a
+                metric_b = pm[old1] + bm_b
+
+                if metric_b < metric_a:
+                    pm_next[s_new] = metric_b
+                    survivors[t, s_new] = 1
+                else:
+                    pm_next[s_new] = metric_a
+                    survivors[t, s_new] = 0
+
+            pm, pm_next = pm_next, pm
+
+        # Traceback from the best end state, keeping only this frame's core
+        s = np.argmin(pm)
+        for t in range(steps - 1, -1, -1):
+            i = lo + t
+            if start <= i < end:
+                out[i] = s >> (k - 2)
+            s = ((s & mask) << 1) | survivors[t, s]
+
+
+if njit is not None:
+    _decode_frames = njit(cache=True, parallel=True, boundscheck=False)(
+        _decode_frames
+    )
+
+
+def viterbi_decode_fn(k=3, g1=0b111, g2=0b101, q=1, subframe=4096):
+    """Build a `decode_fn` for `ber_utils.ber_curve`
+
+    Parameters
+    ----------
+    k : int
+        Constraint length
+
+    g1 : int
+        Generator Polynomial 1
+
+    g2 : int
+        Generator Polynomial 2
+
+    q : int
+        Quantisation order of the channel symbols. Must match the `q` given
+        to `ber_curve`
+
+    subframe : int, optional
+        Symbols decoded per parallel subframe
+
+    Returns a function mapping the interleaved quantised stream to decoded
+    +1/-1 data bits
+    """
+    x_max = (2 ** q) - 1
+    overlap = 8 * k
+
+    # Codeword for every possible shift register state, as for the encoder
+    cw = np.empty(1 << k, dtype=np.uint8)
+    for state in range(1 << k):
+        c1 = (state & g1).bit_count() & 1
+        c2 = (state & g2).bit_count() & 1
+        cw[state] = (c1 << 1) | c2
+
+    # ber_curve pickles decode_fn into every pool task, so return a partial
+    # of a module-level function rather than a local closure; closures are
+    # not picklable
+    return partial(
+        _decode, cw=cw, k=k, x_max=x_max, subframe=subframe, overlap=overlap
+    )
+
+
+def _decode(bits, cw, k, x_max, subframe, overlap):
+    bits = np.ascontiguousarray(bits, dtype=np.uint8)
+    out = np.empty(len(bits) // 2, dtype=np.uint8)
+
+    _decode_frames(bits, out, cw, np.int64(k), np.int64(x_max), subframe, overlap)
+
+    return out.astype(np.int8) * 2 - 1
+
+
+class ViterbiDecodeFnTest(unittest.TestCase):
+    @staticmethod
+    def encode_fn(signal, k=3, g1=0b111, g2=0b101):
+        """Reference encoder: +1/-1 data to the interleaved +1/-1 stream"""
+        reg = 0
+        coded = np.empty(2 * len(signal), dtype=np.int8)
+        for i, s in enumerate(signal):
+            state = ((1 if s > 0 else 0) << (k - 1)) | reg
+            reg = state >> 1
+            coded[2 * i] = 2 * ((state & g1).bit_count() & 1) - 1
+            coded[2 * i + 1] = 2 * ((state & g2).bit_count() & 1) - 1
+        return coded
+
+    def test_unit_ber_curve(self):
+        """The decoder must survive being pickled into ber_curve's worker pool"""
+        import ber_utils
+
+        eb_n0, ber = ber_utils.ber_curve(
+            decode_fn=viterbi_decode_fn(k=3, q=3),
+            encode_fn=self.encode_fn,
+            q=3,
+            length=1e4,
+            start_dB=4,
+            end_dB=4,
+            step=1,
+        )
+
+        np.testing.assert_array_equal(eb_n0, [4])
+        # Soft decision BER here is ~1e-3; well below the ~1.25% uncoded
+        # BER at 4 dB Eb/N0
+        self.assertLess(ber[0], 0.0125)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,5 @@
 import os
-from setuptools import setup
+from setuptools import setup, Extension
 
 
 def read(fname):
@@ -17,5 +17,14 @@ setup(
     packages=["convolutionalcodes"],
     package_data={"": ["util/__init__.py", "util/test.py"]},
     install_requires=["amaranth"],
+    ext_modules=[
+        # Optional native batch path for the software encoder. The pure
+        # python implementation is used when this is not built
+        Extension(
+            "convolutionalcodes._viterbi_encode",
+            sources=["convolutionalcodes/_viterbi_encode.c"],
+            optional=True,
+        )
+    ],
     long_description=read("README.md"),
 )